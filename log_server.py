@@ -3,6 +3,7 @@
 Remote Log Server for Quest AR Debugging
 
 Run this on your dev machine:
+    pip install orjson
     python log_server.py
 
 Then configure your AR app to send logs to:
@@ -13,19 +14,41 @@ View logs at:
 """
 
 import http.server
-import json
 import html
 import logging
+from collections import deque
 from datetime import datetime
-from urllib.parse import urlparse, parse_qs
 import socket
+import sys
+import threading
+import time
+from urllib.parse import parse_qs
+
+import orjson
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
 PORT = 8765
-logs = []
 MAX_LOGS = 500
+logs = deque(maxlen=MAX_LOGS)  # oldest entries are evicted automatically
+logs_lock = threading.Lock()
+logs_changed = threading.Condition(logs_lock)  # wakes /events streams
+log_seq = 0  # total entries ever added
+log_generation = 0  # bumped on every clear
+MAX_BODY = 64 * 1024  # larger POSTs are rejected with 413
+EVENTS_PING_INTERVAL = 15  # seconds between keep-alive comments on /events
+
+# Terminal colors per level; skipped when the log stream isn't a terminal
+LEVEL_COLORS = {'ERROR': '\033[91m', 'WARN': '\033[93m', 'SUCCESS': '\033[92m', 'INFO': '\033[94m', 'DEBUG': '\033[90m'}
+COLOR_RESET = '\033[0m'
+USE_COLOR = sys.stderr.isatty()  # logging.basicConfig writes to stderr
+
+CORS_HEADERS = (
+    ('Access-Control-Allow-Origin', '*'),
+    ('Access-Control-Allow-Methods', 'GET, POST, OPTIONS'),
+    ('Access-Control-Allow-Headers', 'Content-Type'),
+)
 
 
 def get_local_ip():
@@ -40,102 +63,289 @@ def get_local_ip():
         return "localhost"
 
 
+def format_time(t):
+    """Format a time.time() value as local HH:MM:SS.mmm."""
+    secs = int(t)
+    lt = time.localtime(secs)
+    return f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}.{int((t - secs) * 1000):03d}"
+
+
+class JoinedBuffer:
+    """Bytes items joined by a separator, with cheap append and drop-oldest."""
+
+    def __init__(self, sep, prefix=b'', suffix=b''):
+        self.sep = sep
+        self.prefix = prefix
+        self.suffix = suffix
+        self.data = bytearray(prefix + suffix)
+        self.sizes = deque()  # length of each item in data
+
+    def append(self, item):
+        end = len(self.data) - len(self.suffix)
+        self.data[end:] = (self.sep if self.sizes else b'') + item + self.suffix
+        self.sizes.append(len(item))
+
+    def popleft(self):
+        # Drop the oldest item along with the separator that follows it
+        size = self.sizes.popleft()
+        if self.sizes:
+            size += len(self.sep)
+        start = len(self.prefix)
+        del self.data[start:start + size]
+
+    def clear(self):
+        self.data[:] = self.prefix + self.suffix
+        self.sizes.clear()
+
+    def tail(self, count):
+        """Return the newest `count` items, still joined by the separator."""
+        if count <= 0:
+            return b''
+        size = sum(self.sizes[i] for i in range(-count, 0)) + len(self.sep) * (count - 1)
+        end = len(self.data) - len(self.suffix)
+        return bytes(self.data[end - size:end])
+
+    def __bytes__(self):
+        return bytes(self.data)
+
+
+# Pre-rendered /logs.json, /raw and viewer HTML, kept in sync with `logs`
+# so requests never re-serialize the whole history
+logs_json = JoinedBuffer(b',', b'[', b']')
+logs_raw = JoinedBuffer(b'\n')
+logs_html = JoinedBuffer(b'')
+
+
+def escape_html(value):
+    """HTML-escape a value for the viewer, keeping it on a single line."""
+    # Event stream data can't contain raw line breaks
+    return html.escape(str(value)).replace('\n', '&#10;').replace('\r', '&#13;')
+
+
+def render_html(entry):
+    """Render an entry as a viewer log row."""
+    level = str(entry['level'])
+    # 'received' is our own HH:MM:SS.mmm string and needs no escaping
+    return (
+        f'<div class="log-entry">'
+        f'<span class="timestamp">{entry["received"]}</span> '
+        f'<span class="level level-{escape_html(level)}">[{escape_html(level.upper())}]</span> '
+        f'<span class="message">{entry["message_html"]}</span>'
+        f'</div>'
+    )
+
+
+def add_log(entry):
+    """Append an entry to the shared log store."""
+    global log_seq
+    # Escaped once here; reused by the viewer rows and /logs.json clients
+    entry['message_html'] = escape_html(entry['message'])
+    data = orjson.dumps(entry)
+    raw = f"[{entry['received']}] [{entry['level'].upper()}] {entry['message']}".encode()
+    row = render_html(entry).encode()
+    with logs_lock:
+        if len(logs) == MAX_LOGS:
+            logs_json.popleft()
+            logs_raw.popleft()
+            logs_html.popleft()
+        logs.append(entry)
+        logs_json.append(data)
+        logs_raw.append(raw)
+        logs_html.append(row)
+        log_seq += 1
+        logs_changed.notify_all()
+
+
+def clear_logs():
+    """Empty the shared log store."""
+    global log_generation
+    with logs_lock:
+        logs.clear()
+        logs_json.clear()
+        logs_raw.clear()
+        logs_html.clear()
+        log_generation += 1
+        logs_changed.notify_all()
+
+
+def response_head(protocol_version, content_type=None, extra_headers=()):
+    """Pre-encode the status line and fixed headers of a 200 response.
+
+    The result stops before the blank line ending the headers, so callers
+    can still add Content-Length.
+    """
+    lines = [f'{protocol_version} 200 OK']
+    lines += [f'{keyword}: {value}' for keyword, value in CORS_HEADERS]
+    if content_type:
+        lines.append(f'Content-Type: {content_type}')
+    lines += [f'{keyword}: {value}' for keyword, value in extra_headers]
+    return ''.join(line + '\r\n' for line in lines).encode('latin-1')
+
+
 class LogHandler(http.server.BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open, so the viewer's poll and the Quest's
+    # POSTs reuse one socket; every response therefore sends Content-Length
+    protocol_version = 'HTTP/1.1'
+    timeout = 60  # drop idle keep-alive connections
+    
+    # Pre-built response heads, one per content type we serve
+    EMPTY_HEAD = response_head(protocol_version)
+    JSON_HEAD = response_head(protocol_version, 'application/json')
+    TEXT_HEAD = response_head(protocol_version, 'text/plain; charset=utf-8')
+    HTML_HEAD = response_head(protocol_version, 'text/html; charset=utf-8')
+    # Event streams have no length and end when the client disconnects
+    EVENTS_HEAD = response_head(
+        protocol_version,
+        'text/event-stream',
+        (('Cache-Control', 'no-cache'), ('Connection', 'close')),
+    ) + b'\r\n'
+    
+    def setup(self):
+        super().setup()
+        # Reused by every POST on this (keep-alive) connection
+        self.body_buffer = bytearray(MAX_BODY)
+    
     def log_message(self, format, *args):
         pass  # Suppress default logging
     
-    def send_cors_headers(self):
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+    def read_body(self, length):
+        # length is capped at MAX_BODY, so it always fits the buffer
+        view = memoryview(self.body_buffer)[:length]
+        return view[:self.rfile.readinto(view)]
+    
+    def send_body(self, head, body):
+        # Headers and body go out in a single write
+        self.wfile.write(head + b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
     
     def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_cors_headers()
-        self.end_headers()
+        self.send_body(self.EMPTY_HEAD, b'')
     
     def do_POST(self):
         if self.path == '/log':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+            try:
+                content_length = int(self.headers.get('Content-Length', 0))
+            except ValueError:
+                content_length = -1
+            if content_length < 0:
+                self.send_error(400, 'Bad Content-Length')
+                return
+            if content_length > MAX_BODY:
+                self.send_error(413, f'Log entries are limited to {MAX_BODY} bytes')
+                return
+            body = self.read_body(content_length)
+            now = time.time()
             
             try:
-                data = json.loads(body)
+                data = orjson.loads(body)
                 entry = {
-                    'timestamp': data.get('timestamp', datetime.now().isoformat()),
+                    # orjson serializes datetime natively, no need to isoformat() here
+                    'timestamp': data['timestamp'] if 'timestamp' in data else datetime.fromtimestamp(now),
                     'level': data.get('level', 'info'),
                     'message': data.get('message', str(data)),
-                    'received': datetime.now().strftime('%H:%M:%S.%f')[:-3]
+                    'received': format_time(now)
                 }
-                logs.append(entry)
+                add_log(entry)
                 
                 # Print to terminal with color
                 level = entry['level'].upper()
-                colors = {'ERROR': '\033[91m', 'WARN': '\033[93m', 'SUCCESS': '\033[92m', 'INFO': '\033[94m', 'DEBUG': '\033[90m'}
-                reset = '\033[0m'
-                color = colors.get(level, '')
-                logger.info(f"{color}[{entry['received']}] [{level}] {entry['message']}{reset}")
+                if USE_COLOR:
+                    logger.info(f"{LEVEL_COLORS.get(level, '')}[{entry['received']}] [{level}] {entry['message']}{COLOR_RESET}")
+                else:
+                    logger.info(f"[{entry['received']}] [{level}] {entry['message']}")
                 
-                # Trim old logs
-                while len(logs) > MAX_LOGS:
-                    logs.pop(0)
-                
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
+                body = str(body, 'utf-8', errors='replace')
                 entry = {
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': datetime.fromtimestamp(now),
                     'level': 'info',
                     'message': body,
-                    'received': datetime.now().strftime('%H:%M:%S.%f')[:-3]
+                    'received': format_time(now)
                 }
-                logs.append(entry)
+                add_log(entry)
                 logger.info(f"[{entry['received']}] {body}")
             
-            self.send_response(200)
-            self.send_cors_headers()
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-            self.wfile.write(b'{"ok":true}')
+            self.send_body(self.JSON_HEAD, b'{"ok":true}')
         else:
+            # The body wasn't read, so the connection can't be reused
             self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.send_header('Connection', 'close')
             self.end_headers()
     
     def do_GET(self):
-        parsed = urlparse(self.path)
-        
-        if parsed.path == '/logs.json':
-            # Return logs as JSON (for programmatic access)
-            self.send_response(200)
-            self.send_cors_headers()
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(logs).encode())
-        
-        elif parsed.path == '/clear':
-            logs.clear()
-            self.send_response(200)
-            self.send_cors_headers()
-            self.end_headers()
-            self.wfile.write(b'Logs cleared')
-        
-        elif parsed.path == '/raw':
-            # Plain text logs for easy copy/paste
-            self.send_response(200)
-            self.send_cors_headers()
-            self.send_header('Content-Type', 'text/plain; charset=utf-8')
-            self.end_headers()
-            text = '\n'.join(f"[{e['received']}] [{e['level'].upper()}] {e['message']}" for e in logs)
-            self.wfile.write(text.encode())
-        
-        else:
-            # Serve the log viewer HTML
-            self.send_response(200)
-            self.send_cors_headers()
-            self.send_header('Content-Type', 'text/html')
-            self.end_headers()
-            self.wfile.write(self.get_viewer_html().encode())
+        # Only literal paths are routed, so just drop any query string
+        path = self.path.partition('?')[0]
+        self.GET_ROUTES.get(path, LogHandler.serve_viewer)(self)
+    
+    def serve_logs_json(self):
+        # Return logs as JSON (for programmatic access)
+        with logs_lock:
+            body = bytes(logs_json)
+        self.send_body(self.JSON_HEAD, body)
+    
+    def serve_clear(self):
+        clear_logs()
+        self.send_body(self.EMPTY_HEAD, b'Logs cleared')
+    
+    def serve_logs_html(self):
+        # Viewer rows for entries from ?since=N on; X-Log-Seq is the value
+        # to pass as `since` next time
+        since = parse_qs(self.path.partition('?')[2]).get('since', ['0'])[0]
+        try:
+            since = int(since)
+        except ValueError:
+            since = 0
+        with logs_lock:
+            seq = log_seq
+            body = logs_html.tail(min(seq - since, len(logs)))
+        self.send_body(self.HTML_HEAD + f'X-Log-Seq: {seq}\r\n'.encode(), body)
+    
+    def serve_raw(self):
+        # Plain text logs for easy copy/paste
+        with logs_lock:
+            body = bytes(logs_raw)
+        self.send_body(self.TEXT_HEAD, body)
+    
+    def serve_events(self):
+        # Server-Sent Events: a 'reset' event with the full history, then a
+        # message with each batch of new entries as they arrive, all as
+        # pre-rendered viewer rows
+        self.close_connection = True
+        self.wfile.write(self.EVENTS_HEAD)
+        seq = generation = None
+        try:
+            while True:
+                with logs_changed:
+                    logs_changed.wait_for(
+                        lambda: (log_seq, log_generation) != (seq, generation),
+                        timeout=EVENTS_PING_INTERVAL,
+                    )
+                    added = log_seq - seq if generation == log_generation else None
+                    if added is None or added > len(logs):
+                        event = b'event: reset\ndata: ' + bytes(logs_html) + b'\n\n'
+                    elif added:
+                        event = b'data: ' + logs_html.tail(added) + b'\n\n'
+                    else:
+                        event = b': ping\n\n'  # lets us notice closed connections
+                    seq, generation = log_seq, log_generation
+                self.wfile.write(event)
+        except OSError:
+            pass  # Client went away
+    
+    def serve_viewer(self):
+        # Serve the log viewer HTML
+        self.send_body(self.HTML_HEAD, VIEWER_HTML_BYTES)
     
-    def get_viewer_html(self):
-        return '''<!DOCTYPE html>
+    GET_ROUTES = {
+        '/logs.json': serve_logs_json,
+        '/logs.html': serve_logs_html,
+        '/clear': serve_clear,
+        '/raw': serve_raw,
+        '/events': serve_events,
+    }
+
+
+VIEWER_HTML = '''<!DOCTYPE html>
 <html>
 <head>
     <title>Quest AR Debug Logs</title>
@@ -199,44 +409,31 @@ class LogHandler(http.server.BaseHTTPRequestHandler):
         <button onclick="copyLogs()">📋 Copy All Logs</button>
         <button onclick="clearLogs()" class="danger">🗑️ Clear</button>
         <button onclick="downloadLogs()">💾 Download</button>
-        <span id="status">Polling...</span>
+        <span id="status">Connecting...</span>
         <span class="copy-hint">Tip: /raw endpoint gives plain text</span>
     </div>
     <div id="logs"></div>
     
     <script>
-        let lastCount = 0;
+        const MAX_LOGS = {{MAX_LOGS}};
         const logsDiv = document.getElementById('logs');
         const statusEl = document.getElementById('status');
         
-        function escapeHtml(s) {
-            return s.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
-        }
-        
-        async function fetchLogs() {
-            try {
-                const resp = await fetch('/logs.json');
-                const logs = await resp.json();
-                
-                if (logs.length !== lastCount) {
-                    logsDiv.innerHTML = logs.map(e => `
-                        <div class="log-entry">
-                            <span class="timestamp">${e.received}</span>
-                            <span class="level level-${e.level}">[${e.level.toUpperCase()}]</span>
-                            <span class="message">${escapeHtml(e.message)}</span>
-                        </div>
-                    `).join('');
-                    
-                    // Auto-scroll if near bottom
-                    if (logsDiv.scrollHeight - logsDiv.scrollTop < logsDiv.clientHeight + 100) {
-                        logsDiv.scrollTop = logsDiv.scrollHeight;
-                    }
-                    lastCount = logs.length;
+        function showLogs(rows, reset) {
+            // Auto-scroll if near bottom
+            const atBottom = logsDiv.scrollHeight - logsDiv.scrollTop < logsDiv.clientHeight + 100;
+            if (reset) {
+                logsDiv.innerHTML = rows;
+            } else {
+                logsDiv.insertAdjacentHTML('beforeend', rows);
+                while (logsDiv.childElementCount > MAX_LOGS) {
+                    logsDiv.firstElementChild.remove();
                 }
-                statusEl.textContent = `${logs.length} logs | Last update: ${new Date().toLocaleTimeString()}`;
-            } catch (e) {
-                statusEl.textContent = 'Error fetching logs: ' + e.message;
             }
+            if (atBottom) {
+                logsDiv.scrollTop = logsDiv.scrollHeight;
+            }
+            statusEl.textContent = `${logsDiv.childElementCount} logs | Last update: ${new Date().toLocaleTimeString()}`;
         }
         
         async function copyLogs() {
@@ -247,9 +444,8 @@ class LogHandler(http.server.BaseHTTPRequestHandler):
         }
         
         async function clearLogs() {
+            // The server also pushes a reset to every open viewer
             await fetch('/clear');
-            logsDiv.innerHTML = '';
-            lastCount = 0;
         }
         
         async function downloadLogs() {
@@ -264,12 +460,18 @@ class LogHandler(http.server.BaseHTTPRequestHandler):
             URL.revokeObjectURL(url);
         }
         
-        // Poll every 500ms
-        fetchLogs();
-        setInterval(fetchLogs, 500);
+        // The server pushes a 'reset' with the full history on (re)connect,
+        // then a message with each batch of new entries, as rendered rows
+        const events = new EventSource('/events');
+        events.addEventListener('reset', e => showLogs(e.data, true));
+        events.onmessage = e => showLogs(e.data, false);
+        events.onerror = () => {
+            statusEl.textContent = 'Disconnected, retrying...';
+        };
     </script>
 </body>
 </html>'''
+VIEWER_HTML_BYTES = VIEWER_HTML.replace('{{MAX_LOGS}}', str(MAX_LOGS)).encode('utf-8')
 
 
 def main():
@@ -284,7 +486,10 @@ def main():
     print("\n  Press Ctrl+C to stop\n")
     print("="*60 + "\n")
     
-    server = http.server.HTTPServer(('0.0.0.0', PORT), LogHandler)
+    # One thread per connection so a slow POST from one Quest doesn't stall
+    # other devices or the viewer's poll
+    server = http.server.ThreadingHTTPServer(('0.0.0.0', PORT), LogHandler)
+    server.daemon_threads = True
     
     try:
         server.serve_forever()